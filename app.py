@@ -3,6 +3,9 @@ import sqlite3
 import pandas as pd
 import datetime
 import plotly.express as px
+import threading
+import types
+from functools import lru_cache
 
 # ---------------------------
 # Initialize Session State for Bulk Upload Processing
@@ -13,36 +16,107 @@ if "bulk_processed" not in st.session_state:
 # ---------------------------
 # Dark/Light Mode Toggle
 # ---------------------------
+DARK_CSS = """
+    <style>
+        .main { background-color: #2f2f2f; color: #f5f5f5; }
+        .stButton>button { background-color: #555; color: white; }
+        h1, h2, h3, h4, h5, h6 { color: #f5f5f5; }
+        .sidebar .sidebar-content { background-image: linear-gradient(#1f1f1f, #2f2f2f); color: white; }
+    </style>
+"""
+
+LIGHT_CSS = """
+    <style>
+        .main { background-color: #f5f5f5; color: #2f2f2f; }
+        .stButton>button { background-color: #2c3e50; color: white; }
+        h1, h2, h3, h4, h5, h6 { color: #2c3e50; }
+        .sidebar .sidebar-content { background-image: linear-gradient(#2c3e50, #34495e); color: white; }
+    </style>
+"""
+
+@st.cache_data(show_spinner=False)
+def _css(dark: bool) -> str:
+    return DARK_CSS if dark else LIGHT_CSS
+
 if "dark_mode" not in st.session_state:
     st.session_state.dark_mode = False
 
 dark_mode = st.sidebar.checkbox("Dark Mode", value=st.session_state.dark_mode)
 st.session_state.dark_mode = dark_mode
 
-if dark_mode:
-    st.markdown("""
-        <style>
-            .main { background-color: #2f2f2f; color: #f5f5f5; }
-            .stButton>button { background-color: #555; color: white; }
-            h1, h2, h3, h4, h5, h6 { color: #f5f5f5; }
-            .sidebar .sidebar-content { background-image: linear-gradient(#1f1f1f, #2f2f2f); color: white; }
-        </style>
-    """, unsafe_allow_html=True)
-else:
-    st.markdown("""
-        <style>
-            .main { background-color: #f5f5f5; color: #2f2f2f; }
-            .stButton>button { background-color: #2c3e50; color: white; }
-            h1, h2, h3, h4, h5, h6 { color: #2c3e50; }
-            .sidebar .sidebar-content { background-image: linear-gradient(#2c3e50, #34495e); color: white; }
-        </style>
-    """, unsafe_allow_html=True)
+st.markdown(_css(dark_mode), unsafe_allow_html=True)
 
 # ---------------------------
 # Database Initialization
 # ---------------------------
+DAYS = ("Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat")
+LEAVE_CODES = frozenset({"AL", "SL", "CL", "L"})
+DAY_OFFSETS = {d: i for i, d in enumerate(DAYS)}
+
+# Day-column SQL built once per shape so sqlite3's prepared-statement cache
+# sees the same string object on every call instead of re-parsing.
+SELECT_DAY_SQL = {d: f"SELECT {d} FROM schedule WHERE login = ? AND week = ?" for d in DAYS}
+UPDATE_DAY_BY_ID_SQL = {d: f"UPDATE schedule SET {d} = ? WHERE id = ?" for d in DAYS}
+# Conditional updates whose WHERE encodes the precondition; RETURNING tells
+# us in the same round-trip whether anything matched.
+UPDATE_DAY_IF_W_SQL = {d: f"UPDATE schedule SET {d} = ? WHERE login = ? AND week = ? AND {d} = 'W' RETURNING id" for d in DAYS}
+CLEAR_DAY_IF_LEAVE_SQL = {d: f"UPDATE schedule SET {d} = 'W' WHERE login = ? AND week = ? AND {d} IN ('AL','SL','CL','L') RETURNING id" for d in DAYS}
+
+def _apply_pragmas(conn, readonly=False):
+    # WAL avoids the per-commit journal rewrite and lets readers run alongside
+    # the writer; synchronous=NORMAL drops the second fsync per commit.
+    # Read-only connections inherit the persistent WAL mode from the file.
+    c = conn.cursor()
+    if not readonly:
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA mmap_size=268435456")
+    c.execute("PRAGMA cache_size=-65536")
+    c.execute("PRAGMA busy_timeout=5000")
+
+@st.cache_resource
+def _conn_holder():
+    # Streamlit re-execs this script into a fresh namespace on every rerun,
+    # so a bare module-level threading.local() would be rebuilt each time
+    # and the per-thread connections (and their prepared-statement caches)
+    # would never survive a rerun. cache_resource pins one holder per
+    # process.
+    return threading.local()
+
+_tls = _conn_holder()
+
+@st.cache_resource
+def _shared_write_lock():
+    # Serializes the multi-statement write transactions across session
+    # threads so they queue in-process instead of spinning on SQLITE_BUSY.
+    # Like the connection holder above, the lock must be a process-wide
+    # singleton: a per-rerun Lock would give each session its own and
+    # guard nothing.
+    return threading.Lock()
+
+_write_lock = _shared_write_lock()
+
+def get_conn(readonly=False):
+    """
+    Return this thread's SQLite connection, opening it on first use.
+    Streamlit runs each session's script in its own thread; giving every
+    thread its own connection (read-only for the dashboard SELECTs) keeps
+    concurrent readers from serializing on a single shared handle.
+    """
+    attr = "ro_conn" if readonly else "rw_conn"
+    cached = getattr(_tls, attr, None)
+    if cached is None:
+        mode = "ro" if readonly else "rwc"
+        cached = sqlite3.connect(f"file:shrinkage.db?mode={mode}", uri=True,
+                                 check_same_thread=False, cached_statements=256)
+        _apply_pragmas(cached, readonly=readonly)
+        setattr(_tls, attr, cached)
+    return cached
+
+@st.cache_resource
 def init_db():
-    conn = sqlite3.connect("shrinkage.db", check_same_thread=False)
+    conn = get_conn()
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS schedule (
@@ -71,26 +145,62 @@ def init_db():
         )
     """)
     conn.commit()
+    # All hot queries filter on (login, week) or week plus a day column;
+    # without these every lookup is a full table scan.
+    c.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_schedule_login_week ON schedule(login, week);
+        CREATE INDEX IF NOT EXISTS idx_schedule_week ON schedule(week);
+        CREATE INDEX IF NOT EXISTS idx_leaves_login_week_day ON leaves(login, week, day);
+        CREATE INDEX IF NOT EXISTS idx_leaves_week_day ON leaves(week, day);
+    """)
+    # The schedule_days long-form mirror lost its last reader when the
+    # Dashboard moved to single-query overviews; drop it (and its
+    # triggers) from databases created while it existed so schedule
+    # writes stop paying for seven mirror rows apiece.
+    c.executescript("""
+        DROP TRIGGER IF EXISTS trg_schedule_days_ins;
+        DROP TRIGGER IF EXISTS trg_schedule_days_upd;
+        DROP TRIGGER IF EXISTS trg_schedule_days_del;
+        DROP TABLE IF EXISTS schedule_days;
+    """)
+    c.execute("ANALYZE")
     return conn
 
-conn = init_db()
+init_db()
+conn = get_conn()
+# One reusable cursor for the write helpers below; allocating a fresh cursor
+# per call is safe but churns ~30 objects on a busy render.
+cursor = conn.cursor()
 
 # ---------------------------
 # Helper Functions (Week Calculation)
 # ---------------------------
+@lru_cache(maxsize=512)
 def get_week_dates_us(week, year):
     """
     Compute the dates for a given week number using US-style weeks.
     Week 1 is defined as the week containing January 1 (week starts on Sunday).
-    Returns a dict: {"Sun": date, "Mon": date, ..., "Sat": date}.
+    Returns a read-only mapping: {"Sun": date, "Mon": date, ..., "Sat": date}.
+    Results are memoized; the function is pure and called from many hot paths.
     """
     jan1 = datetime.date(year, 1, 1)
-    offset = (jan1.weekday() + 1) % 7  
+    offset = (jan1.weekday() + 1) % 7
     first_sunday = jan1 - datetime.timedelta(days=offset)
     sunday = first_sunday + datetime.timedelta(days=(week - 1) * 7)
-    days = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
-    return {day: sunday + datetime.timedelta(days=i) for i, day in enumerate(days)}
+    return types.MappingProxyType({day: sunday + datetime.timedelta(days=off) for day, off in DAY_OFFSETS.items()})
+
+def compute_leave_dates(df, year):
+    """
+    Vectorized date computation for a DataFrame of leave rows with
+    'week' and 'day' columns. Returns a Series of 'YYYY-MM-DD' strings.
+    """
+    jan1 = datetime.date(year, 1, 1)
+    offset = (jan1.weekday() + 1) % 7
+    first_sunday = pd.Timestamp(jan1 - datetime.timedelta(days=offset))
+    dates = first_sunday + pd.to_timedelta((df["week"] - 1) * 7 + df["day"].map(DAY_OFFSETS), unit="D")
+    return dates.dt.strftime("%Y-%m-%d")
 
+@lru_cache(maxsize=1024)
 def get_week_from_date_us(selected_date):
     year = selected_date.year
     jan1 = datetime.date(year, 1, 1)
@@ -102,96 +212,129 @@ def get_week_from_date_us(selected_date):
 # ---------------------------
 # Database Update Functions
 # ---------------------------
-def add_schedule(login, weeks, shift, weekoffs, year):
-    c = conn.cursor()
-    for week in weeks:
-        schedule_values = {}
-        for day in ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]:
-            schedule_values[day] = "OFF" if day.lower() in weekoffs else "W"
-        c.execute("""
+def build_schedule_rows(login, weeks, shift, weekoffs):
+    """Build the INSERT tuples for one login across several weeks."""
+    weekoffs_set = {w.lower() for w in weekoffs}
+    row_vals = tuple("OFF" if day.lower() in weekoffs_set else "W" for day in DAYS)
+    return [(login, week, shift, *row_vals) for week in weeks]
+
+def insert_schedule_rows(rows):
+    """Insert prepared schedule rows in a single transaction."""
+    c = cursor
+    # `with conn` commits the batch on success and rolls it back if any
+    # statement raises, so a mid-transaction failure (e.g. SQLITE_BUSY)
+    # can't leave the shared connection wedged inside an open transaction.
+    with _write_lock, conn:
+        c.executemany("""
             INSERT INTO schedule (login, week, shift, Sun, Mon, Tue, Wed, Thu, Fri, Sat)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (login, week, shift, schedule_values["Sun"], schedule_values["Mon"],
-              schedule_values["Tue"], schedule_values["Wed"], schedule_values["Thu"],
-              schedule_values["Fri"], schedule_values["Sat"]))
-    conn.commit()
+        """, rows)
+
+def add_schedule(login, weeks, shift, weekoffs, year):
+    insert_schedule_rows(build_schedule_rows(login, weeks, shift, weekoffs))
 
 def update_leave(login, week, day, leave_type, annotation=""):
-    c = conn.cursor()
-    query = f"SELECT {day} FROM schedule WHERE login = ? AND week = ?"
-    c.execute(query, (login, week))
-    result = c.fetchone()
-    if result:
-        current_val = result[0]
-        if current_val == "W":
-            update_query = f"UPDATE schedule SET {day} = ? WHERE login = ? AND week = ?"
-            c.execute(update_query, (leave_type, login, week))
-            c.execute("INSERT INTO leaves (login, week, day, leave_type, annotation) VALUES (?, ?, ?, ?, ?)",
-                      (login, week, day, leave_type, annotation))
-            conn.commit()
-            dates = get_week_dates_us(week, year=datetime.date.today().year)
-            st.success(f"Leave ({leave_type}) updated for {login} on {day} (Date: {dates[day].strftime('%Y-%m-%d')}).")
-        else:
-            st.error(f"Leave already coded for {login} on week {week} {day}. Please delete the existing leave to recode.")
+    assert day in DAYS
+    c = cursor
+    # The WHERE clause encodes the "cell is W" precondition, so the happy
+    # path is one UPDATE; a follow-up SELECT only runs to explain failure.
+    c.execute(UPDATE_DAY_IF_W_SQL[day], (leave_type, login, week))
+    if c.fetchone():
+        c.execute("INSERT INTO leaves (login, week, day, leave_type, annotation) VALUES (?, ?, ?, ?, ?)",
+                  (login, week, day, leave_type, annotation))
+        conn.commit()
+        dates = get_week_dates_us(week, year=datetime.date.today().year)
+        st.success(f"Leave ({leave_type}) updated for {login} on {day} (Date: {dates[day].strftime('%Y-%m-%d')}).")
     else:
-        st.error("No schedule record found for the provided login and week.")
+        conn.commit()
+        c.execute(SELECT_DAY_SQL[day], (login, week))
+        if c.fetchone():
+            st.error(f"Leave already coded for {login} on week {week} {day}. Please delete the existing leave to recode.")
+        else:
+            st.error("No schedule record found for the provided login and week.")
 
 def delete_leave(login, week, day):
-    c = conn.cursor()
-    query = f"SELECT {day} FROM schedule WHERE login = ? AND week = ?"
-    c.execute(query, (login, week))
-    result = c.fetchone()
-    if result:
-        current_val = result[0]
-        if current_val in ("AL", "SL", "CL", "L"):
-            update_query = f"UPDATE schedule SET {day} = ? WHERE login = ? AND week = ?"
-            c.execute(update_query, ("W", login, week))
-            c.execute("DELETE FROM leaves WHERE login = ? AND week = ? AND day = ?", (login, week, day))
-            conn.commit()
-            st.success(f"Deleted leave for {login} on {day} for week {week}.")
-        else:
+    assert day in DAYS
+    c = cursor
+    c.execute(CLEAR_DAY_IF_LEAVE_SQL[day], (login, week))
+    if c.fetchone():
+        c.execute("DELETE FROM leaves WHERE login = ? AND week = ? AND day = ?", (login, week, day))
+        conn.commit()
+        st.success(f"Deleted leave for {login} on {day} for week {week}.")
+    else:
+        conn.commit()
+        c.execute(SELECT_DAY_SQL[day], (login, week))
+        if c.fetchone():
             st.error(f"No coded leave found for {login} on {day} for week {week}.")
+        else:
+            st.error("No schedule record found for the provided login and week.")
+
+def get_schedule_by_week(week, week_dates=None):
+    if week_dates is None:
+        query = "SELECT id, login, shift, Sun, Mon, Tue, Wed, Thu, Fri, Sat FROM schedule WHERE week = ?"
     else:
-        st.error("No schedule record found for the provided login and week.")
+        # Alias the day columns with their dates in the projection so the
+        # DataFrame arrives with display-ready names, skipping the
+        # rename + reindex copies on the pandas side.
+        cols = ", ".join(["login", "shift"] + [f'{d} AS "{d} ({week_dates[d]:%Y-%m-%d})"' for d in DAYS])
+        query = f"SELECT {cols} FROM schedule WHERE week = ?"
+    return pd.read_sql_query(query, get_conn(readonly=True), params=(week,))
 
-def get_schedule_by_week(week):
-    query = "SELECT id, login, shift, Sun, Mon, Tue, Wed, Thu, Fri, Sat FROM schedule WHERE week = ?"
-    return pd.read_sql_query(query, conn, params=(week,))
+@st.cache_resource
+def _stamp_conn():
+    # data_version is a per-connection counter: values are only comparable
+    # to earlier values from the same connection (a fresh one restarts at
+    # 1), so the stamp that keys the process-global caches must come from
+    # one process-wide handle, not the per-thread connections.
+    conn = sqlite3.connect("file:shrinkage.db?mode=ro", uri=True,
+                           check_same_thread=False, cached_statements=256)
+    _apply_pragmas(conn, readonly=True)
+    return conn
 
-def get_weekly_shrinkage_overview():
-    c = conn.cursor()
-    c.execute("SELECT DISTINCT week FROM schedule ORDER BY week")
-    weeks = [row[0] for row in c.fetchall()]
-    overview = []
-    for wk in weeks:
-        c.execute("SELECT Sun, Mon, Tue, Wed, Thu, Fri, Sat FROM schedule WHERE week = ?", (wk,))
-        rows = c.fetchall()
-        total_scheduled = sum(1 for row in rows for cell in row if cell != "OFF")
-        total_leaves = sum(1 for row in rows for cell in row if cell in ("AL", "SL", "CL", "L"))
-        shrinkage = (total_leaves / total_scheduled * 100) if total_scheduled > 0 else 0
-        overview.append({"Week": wk, "Total Scheduled": total_scheduled, "Total Leaves": total_leaves, "Shrinkage (%)": round(shrinkage,2)})
-    return pd.DataFrame(overview)
-
-def get_day_shrinkage_details(week, day):
-    c = conn.cursor()
-    c.execute(f"SELECT COUNT(*) FROM schedule WHERE week = ? AND {day} != 'OFF'", (week,))
-    scheduled = c.fetchone()[0]
-    c.execute(f"SELECT COUNT(*) FROM schedule WHERE week = ? AND {day} IN ('AL','SL','CL','L')", (week,))
-    leaves = c.fetchone()[0]
-    shrinkage = (leaves / scheduled * 100) if scheduled > 0 else 0
-    c.execute("SELECT login, leave_type, annotation FROM leaves WHERE week = ? AND day = ?", (week, day))
-    details = [{"login": row[0], "leave_type": row[1], "annotation": row[2]} for row in c.fetchall()]
-    return {"Scheduled": scheduled, "Leaves": leaves, "Shrinkage (%)": round(shrinkage, 2), "Details": details}
+def _db_stamp():
+    # data_version on the dedicated connection increments whenever any
+    # other connection commits a change, and that connection never writes,
+    # so this invalidates the read caches exactly when the data moves
+    # (including in-place UPDATEs that a COUNT/MAX stamp would miss).
+    return _stamp_conn().execute("PRAGMA data_version").fetchone()[0]
+
+@st.cache_data(show_spinner=False)
+def get_weekly_shrinkage_overview(stamp, weeks=None):
+    # One grouped scan instead of one round-trip per week; SQLite evaluates
+    # the boolean expressions as 0/1 so the SUMs count cells directly.
+    # `weeks` (a tuple) optionally restricts the aggregate to those weeks.
+    scheduled_expr = "+".join(f"({d}!='OFF')" for d in DAYS)
+    leaves_expr = "+".join(f"({d} IN ('AL','SL','CL','L'))" for d in DAYS)
+    where = f"WHERE week IN ({','.join('?' * len(weeks))})" if weeks else ""
+    query = f"""
+        SELECT week AS "Week",
+               SUM({scheduled_expr}) AS "Total Scheduled",
+               SUM({leaves_expr}) AS "Total Leaves"
+        FROM schedule {where} GROUP BY week ORDER BY week
+    """
+    df = pd.read_sql_query(query, get_conn(readonly=True), params=tuple(weeks) if weeks else None)
+    if not df.empty:
+        df["Shrinkage (%)"] = (df["Total Leaves"] / df["Total Scheduled"].replace(0, pd.NA) * 100).fillna(0).round(2)
+    return df
+
+@st.cache_data(show_spinner=False)
+def get_distinct_logins_weeks(stamp):
+    # Shared by several multiselects that otherwise each re-scan the table
+    # on every rerun.
+    c = get_conn(readonly=True).cursor()
+    logins = [r[0] for r in c.execute("SELECT DISTINCT login FROM schedule").fetchall()]
+    weeks = sorted(r[0] for r in c.execute("SELECT DISTINCT week FROM schedule").fetchall())
+    return logins, weeks
 
 def get_daywise_leaves(week, day):
     # Fetch leave details including annotations.
     query = "SELECT id, login, leave_type as Leave_Type, annotation FROM leaves WHERE week = ? AND day = ?"
-    return pd.read_sql_query(query, conn, params=(week, day))
+    return pd.read_sql_query(query, get_conn(readonly=True), params=(week, day))
 
 def update_schedule_day(entry_id, day, new_value):
-    c = conn.cursor()
-    query = f"UPDATE schedule SET {day} = ? WHERE id = ?"
-    c.execute(query, (new_value, entry_id))
+    assert day in DAYS
+    c = cursor
+    c.execute(UPDATE_DAY_BY_ID_SQL[day], (new_value, entry_id))
     c.execute("SELECT login, week FROM schedule WHERE id = ?", (entry_id,))
     row = c.fetchone()
     if row and new_value == "W":
@@ -201,46 +344,97 @@ def update_schedule_day(entry_id, day, new_value):
     st.success(f"Updated schedule entry {entry_id} for {day} to {new_value}.")
 
 def update_schedule_day_bulk(logins, weeks, days, new_value):
-    c = conn.cursor()
-    for login in logins:
-        for week in weeks:
-            for day in days:
-                query = f"UPDATE schedule SET {day} = ? WHERE login = ? AND week = ?"
-                c.execute(query, (new_value, login, week))
-                if new_value == "W":
-                    c.execute("DELETE FROM leaves WHERE login = ? AND week = ? AND day = ?", (login, week, day))
-    conn.commit()
+    c = cursor
+    placeholders_l = ",".join("?" * len(logins))
+    placeholders_w = ",".join("?" * len(weeks))
+    placeholders_d = ",".join("?" * len(days))
+    with _write_lock, conn:
+        for day in days:
+            c.execute(f"UPDATE schedule SET {day} = ? WHERE login IN ({placeholders_l}) AND week IN ({placeholders_w})",
+                      [new_value, *logins, *weeks])
+        if new_value == "W":
+            c.execute(f"DELETE FROM leaves WHERE day IN ({placeholders_d}) AND login IN ({placeholders_l}) AND week IN ({placeholders_w})",
+                      [*days, *logins, *weeks])
     st.success(f"Bulk updated selected entries to {new_value} on {', '.join(days)}.")
 
 def delete_schedule_entries_bulk(logins, weeks):
-    c = conn.cursor()
-    for login in logins:
-        for week in weeks:
-            c.execute("DELETE FROM schedule WHERE login = ? AND week = ?", (login, week))
-    conn.commit()
+    c = cursor
+    ql = ",".join("?" * len(logins))
+    qw = ",".join("?" * len(weeks))
+    with _write_lock, conn:
+        c.execute(f"DELETE FROM schedule WHERE login IN ({ql}) AND week IN ({qw})", [*logins, *weeks])
+        c.execute(f"DELETE FROM leaves WHERE login IN ({ql}) AND week IN ({qw})", [*logins, *weeks])
     st.success("Selected schedule entries deleted.")
 
 def delete_entire_week_bulk(weeks):
-    c = conn.cursor()
-    for week in weeks:
-        c.execute("DELETE FROM schedule WHERE week = ?", (week,))
-    conn.commit()
+    c = cursor
+    qw = ",".join("?" * len(weeks))
+    with _write_lock, conn:
+        c.execute(f"DELETE FROM schedule WHERE week IN ({qw})", weeks)
+        c.execute(f"DELETE FROM leaves WHERE week IN ({qw})", weeks)
     st.success("Entire week(s) deleted successfully.")
 
 def get_leave_summary(login):
     query = "SELECT id, login, week, day, leave_type, annotation FROM leaves WHERE login = ?"
-    df = pd.read_sql_query(query, conn, params=(login,))
+    df = pd.read_sql_query(query, get_conn(readonly=True), params=(login,))
     if not df.empty:
-        df["Date"] = df.apply(lambda row: get_week_dates_us(row["week"], datetime.date.today().year)[row["day"]].strftime("%Y-%m-%d"), axis=1)
+        df["Date"] = compute_leave_dates(df, datetime.date.today().year)
     return df
 
-def get_day_shrinkage_overview(week):
-    days = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
-    data = []
-    for d in days:
-        details = get_day_shrinkage_details(week, d)
-        data.append({"Day": d, "Shrinkage (%)": details["Shrinkage (%)"], "Scheduled": details["Scheduled"], "Leaves": details["Leaves"]})
-    return pd.DataFrame(data)
+@st.cache_data(show_spinner=False)
+def get_week_leave_details(week, stamp):
+    """All leave detail rows for a week, grouped by day, from one query;
+    `stamp` only keys the cache."""
+    c = get_conn(readonly=True).cursor()
+    c.execute("SELECT day, login, leave_type, annotation FROM leaves WHERE week = ?", (week,))
+    groups = {}
+    for day, login, leave_type, annotation in c.fetchall():
+        groups.setdefault(day, []).append({"login": login, "leave_type": leave_type, "annotation": annotation})
+    return groups
+
+def _leaves_stamp():
+    # Cheap cache-invalidation token: changes whenever leave rows are
+    # added or removed.
+    return get_conn(readonly=True).execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM leaves").fetchone()
+
+@st.cache_data(show_spinner=False)
+def load_monthly_leaves(selected_weeks, first_sunday_iso, stamp):
+    # Leaves for the selected weeks with each record's date derived in SQL
+    # from the year's first Sunday; `stamp` only keys the cache.
+    query = """
+        WITH day_off(day, off) AS (VALUES ('Sun',0),('Mon',1),('Tue',2),('Wed',3),('Thu',4),('Fri',5),('Sat',6))
+        SELECT l.id, l.login, l.week, l.day, l.leave_type, l.annotation,
+               date(?, '+' || ((l.week - 1) * 7 + d.off) || ' days') AS Date
+        FROM leaves l JOIN day_off d ON d.day = l.day
+        WHERE l.week IN ({seq})
+    """.format(seq=','.join(['?'] * len(selected_weeks)))
+    return pd.read_sql_query(query, get_conn(readonly=True), params=[first_sunday_iso, *selected_weeks])
+
+@st.cache_data(show_spinner=False)
+def get_monthly_report(selected_weeks, first_sunday_iso, stamp):
+    """
+    Full Monthly Report payload for the selected weeks: the leave rows,
+    the per-week leave counts, and the total. Deterministic given the
+    leaves table contents, so it caches on the same stamp as the load.
+    """
+    df_leaves = load_monthly_leaves(selected_weeks, first_sunday_iso, stamp)
+    df_group = df_leaves.groupby("week").size().reset_index(name="Leaves Count")
+    return df_leaves, df_group, len(df_leaves)
+
+@st.cache_data(show_spinner=False)
+def get_day_shrinkage_overview(week, stamp):
+    # Fetch the week's rows once and count all seven days in pandas instead
+    # of issuing two COUNT queries per day.
+    df = pd.read_sql_query("SELECT Sun, Mon, Tue, Wed, Thu, Fri, Sat FROM schedule WHERE week = ?",
+                           get_conn(readonly=True), params=(week,))
+    # Status cells come from a tiny alphabet; categorical columns compare on
+    # int8 codes instead of object strings.
+    df = df.astype("category")
+    scheduled = (df != "OFF").sum()
+    leaves = df.isin(LEAVE_CODES).sum()
+    shrinkage = (leaves / scheduled.replace(0, pd.NA) * 100).fillna(0).round(2)
+    return pd.DataFrame({"Day": list(df.columns), "Shrinkage (%)": shrinkage.values,
+                         "Scheduled": scheduled.values, "Leaves": leaves.values})
 
 # ---------------------------
 # Main Navigation
@@ -253,7 +447,7 @@ if menu == "Dashboard":
     st.markdown("### Overview and Interactive Analytics")
     
     # Weekly Shrinkage Overview
-    df_shrink = get_weekly_shrinkage_overview()
+    df_shrink = get_weekly_shrinkage_overview(_db_stamp())
     if not df_shrink.empty:
         st.subheader("Weekly Shrinkage Overview")
         st.dataframe(df_shrink)
@@ -265,7 +459,7 @@ if menu == "Dashboard":
     # Day-wise Shrinkage Analysis with Absent Details
     st.markdown("### Day-wise Shrinkage Analysis")
     selected_week_for_day = st.number_input("Enter Week Number for Day-wise Analysis", min_value=1, step=1, value=1, key="day_shrink_week")
-    df_day_shrink = get_day_shrinkage_overview(selected_week_for_day)
+    df_day_shrink = get_day_shrinkage_overview(selected_week_for_day, _db_stamp())
     st.dataframe(df_day_shrink)
     fig_day = px.bar(df_day_shrink, x="Day", y="Shrinkage (%)",
                      title=f"Day-wise Shrinkage for Week {selected_week_for_day}",
@@ -274,12 +468,12 @@ if menu == "Dashboard":
     
     st.markdown("#### Absent Details by Day")
     week_dates = get_week_dates_us(selected_week_for_day, datetime.date.today().year)
-    for day in ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]:
-        details = get_day_shrinkage_details(selected_week_for_day, day)
+    leave_groups = get_week_leave_details(selected_week_for_day, _leaves_stamp())
+    for day in DAYS:
+        details = leave_groups.get(day)
         st.markdown(f"**{day} - {week_dates[day].strftime('%Y-%m-%d')}**")
-        if details["Details"]:
-            df_details = pd.DataFrame(details["Details"])
-            st.table(df_details)
+        if details:
+            st.table(pd.DataFrame(details))
         else:
             st.write("No absences for this day.")
 
@@ -319,7 +513,7 @@ elif menu == "Schedule Management":
             except Exception as e:
                 st.error(f"Error: {e}")
         if st.checkbox("Show Schedule Data"):
-            c = conn.cursor()
+            c = cursor
             c.execute("SELECT DISTINCT week FROM schedule ORDER BY week")
             week_list = [row[0] for row in c.fetchall()]
             if week_list:
@@ -351,23 +545,26 @@ elif menu == "Schedule Management":
                     if missing:
                         st.error(f"Missing columns: {', '.join(missing)}")
                     else:
-                        for index, row in df_excel.iterrows():
-                            logins_str = row["CSA Logins"]
-                            week_val = row["Week"]
-                            year_val = row["year"]
-                            shift_val = row["shift"]
-                            weekoff_str = row["Weekoff"]
-                            logins_bulk = [x.strip() for x in str(logins_str).split(",") if x.strip()]
-                            weekoffs_bulk = [x.strip().lower() for x in str(weekoff_str).split(",") if x.strip()] if pd.notnull(weekoff_str) else []
-                            for login in logins_bulk:
-                                add_schedule(login, [int(week_val)], shift_val, weekoffs_bulk, int(year_val))
+                        # Pre-split the comma-separated columns with vectorized
+                        # string ops, then expand into insert rows in one pass.
+                        logins_split = df_excel["CSA Logins"].astype(str).str.split(",")
+                        weekoffs_split = df_excel["Weekoff"].fillna("").astype(str).str.lower().str.split(",")
+                        bulk_rows = [
+                            row
+                            for logins_list, week_val, shift_val, wo_list in zip(
+                                logins_split, df_excel["Week"], df_excel["shift"], weekoffs_split)
+                            for login in (x.strip() for x in logins_list) if login
+                            for row in build_schedule_rows(login, [int(week_val)], shift_val,
+                                                           {w.strip() for w in wo_list if w.strip()})
+                        ]
+                        insert_schedule_rows(bulk_rows)
                         st.success("Bulk schedule upload processed successfully.")
                         st.session_state.bulk_processed = True
                 except Exception as e:
                     st.error(f"Error processing file: {e}")
     elif sub_menu == "Leaves & Shrinkage":
         st.header("Leaves & Shrinkage")
-        c = conn.cursor()
+        c = cursor
         c.execute("SELECT DISTINCT login FROM schedule")
         all_logins = [row[0] for row in c.fetchall()]
         if all_logins:
@@ -378,8 +575,9 @@ elif menu == "Schedule Management":
             if weeks_available:
                 selected_week = st.selectbox("Select Week", weeks_available)
                 year_for_leave = st.number_input("Enter Year", value=datetime.date.today().year, step=1, key="year_leave")
-                # Retrieve schedule for selected CSA and week
-                df_schedule = pd.read_sql_query("SELECT * FROM schedule WHERE login = ? AND week = ?", conn, params=(selected_login, selected_week))
+                # Retrieve schedule for selected CSA and week (day columns only)
+                df_schedule = pd.read_sql_query("SELECT Sun, Mon, Tue, Wed, Thu, Fri, Sat FROM schedule WHERE login = ? AND week = ?",
+                                                get_conn(readonly=True), params=(selected_login, selected_week))
                 if not df_schedule.empty:
                     dates = get_week_dates_us(selected_week, year_for_leave)
                     schedule_data = []
@@ -440,18 +638,15 @@ elif menu == "Reports":
         st.subheader("View Schedule by Week")
         selected_week = st.number_input("Enter Week Number", min_value=1, step=1, key="view_week")
         year_view = st.number_input("Enter Year", value=datetime.date.today().year, step=1, key="view_year")
-        df_schedule = get_schedule_by_week(selected_week)
+        week_dates = get_week_dates_us(selected_week, year_view)
+        df_schedule = get_schedule_by_week(selected_week, week_dates)
         if not df_schedule.empty:
-            week_dates = get_week_dates_us(selected_week, year_view)
-            rename_dict = {d: f"{d} ({week_dates[d].strftime('%Y-%m-%d')})" for d in ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]}
-            df_schedule = df_schedule.rename(columns=rename_dict)
-            df_schedule = df_schedule[["login", "shift"] + list(rename_dict.values())]
             st.dataframe(df_schedule)
         else:
             st.info("No schedule records found for the selected week.")
     with tabs[1]:
         st.subheader("Weekly Shrinkage Overview")
-        df_overview = get_weekly_shrinkage_overview()
+        df_overview = get_weekly_shrinkage_overview(_db_stamp())
         if not df_overview.empty:
             st.dataframe(df_overview)
             st.markdown("#### Shrinkage Bar Chart")
@@ -474,13 +669,12 @@ elif menu == "Reports":
     with tabs[3]:
         st.subheader("Delete Entry")
         st.markdown("**Bulk Delete Options:**")
+        all_logins_cached, all_weeks_cached = get_distinct_logins_weeks(_db_stamp())
         col_del1, col_del2 = st.columns(2)
         with col_del1:
-            del_logins = st.multiselect("Select CSA Login(s) to delete", 
-                                        pd.read_sql_query("SELECT DISTINCT login FROM schedule", conn)["login"].tolist())
+            del_logins = st.multiselect("Select CSA Login(s) to delete", all_logins_cached)
         with col_del2:
-            del_weeks = st.multiselect("Select Week(s) to delete", 
-                                       sorted(pd.read_sql_query("SELECT DISTINCT week FROM schedule", conn)["week"].tolist()))
+            del_weeks = st.multiselect("Select Week(s) to delete", all_weeks_cached)
         if st.button("Delete Selected Entries"):
             if del_logins and del_weeks:
                 delete_schedule_entries_bulk(del_logins, del_weeks)
@@ -488,8 +682,7 @@ elif menu == "Reports":
                 st.error("Please select at least one login and one week.")
         st.markdown("---")
         st.markdown("**Bulk Delete Entire Week(s):**")
-        entire_weeks = st.multiselect("Select Entire Week(s) to delete", 
-                                       sorted(pd.read_sql_query("SELECT DISTINCT week FROM schedule", conn)["week"].tolist()))
+        entire_weeks = st.multiselect("Select Entire Week(s) to delete", all_weeks_cached)
         if st.button("Delete Entire Week(s)"):
             if entire_weeks:
                 delete_entire_week_bulk(entire_weeks)
@@ -497,31 +690,39 @@ elif menu == "Reports":
                 st.error("Please select at least one week.")
         st.markdown("---")
         st.markdown("**Or delete individual entries:**")
-        df_all = pd.read_sql_query("SELECT * FROM schedule", conn)
+        # Page through the table instead of materializing every row just to
+        # render a grid and an ID picker.
+        total_rows = conn.execute("SELECT COUNT(*) FROM schedule").fetchone()[0]
+        page_size = 200
+        total_pages = max(1, -(-total_rows // page_size))
+        page = st.number_input("Page", min_value=1, max_value=total_pages, step=1, value=1, key="delete_page")
+        df_all = pd.read_sql_query("SELECT * FROM schedule ORDER BY id LIMIT ? OFFSET ?",
+                                   conn, params=(page_size, (page - 1) * page_size))
+        st.caption(f"Showing {len(df_all)} of {total_rows} entries")
         st.dataframe(df_all)
         if not df_all.empty:
             ids_to_delete = st.multiselect("Select Schedule ID(s) to delete", df_all["id"].tolist())
             if st.button("Delete Selected IDs"):
                 if ids_to_delete:
-                    c = conn.cursor()
-                    for i in ids_to_delete:
-                        c.execute("DELETE FROM schedule WHERE id = ?", (i,))
-                    conn.commit()
+                    ph = ",".join("?" * len(ids_to_delete))
+                    with conn:
+                        conn.execute(f"DELETE FROM leaves WHERE (login, week) IN (SELECT login, week FROM schedule WHERE id IN ({ph}))", ids_to_delete)
+                        conn.execute(f"DELETE FROM schedule WHERE id IN ({ph})", ids_to_delete)
                     st.success("Selected entries deleted.")
-                    df_all = pd.read_sql_query("SELECT * FROM schedule", conn)
+                    df_all = pd.read_sql_query("SELECT * FROM schedule ORDER BY id LIMIT ? OFFSET ?",
+                                               conn, params=(page_size, (page - 1) * page_size))
                     st.dataframe(df_all)
                 else:
                     st.error("Please select at least one Schedule ID.")
     with tabs[4]:
         st.subheader("Update Entry")
         st.markdown("**Bulk Update Options:**")
+        all_logins_cached, all_weeks_cached = get_distinct_logins_weeks(_db_stamp())
         col_up1, col_up2 = st.columns(2)
         with col_up1:
-            up_logins = st.multiselect("Select CSA Login(s) to update", 
-                                        pd.read_sql_query("SELECT DISTINCT login FROM schedule", conn)["login"].tolist())
+            up_logins = st.multiselect("Select CSA Login(s) to update", all_logins_cached)
         with col_up2:
-            up_weeks = st.multiselect("Select Week(s) to update", 
-                                       sorted(pd.read_sql_query("SELECT DISTINCT week FROM schedule", conn)["week"].tolist()))
+            up_weeks = st.multiselect("Select Week(s) to update", all_weeks_cached)
         up_days = st.multiselect("Select Day(s) to update", ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"])
         new_value = st.radio("Select new value", ["W", "L"])
         if st.button("Update Selected Entries"):
@@ -531,7 +732,7 @@ elif menu == "Reports":
                 st.error("Please select at least one login, one week, and one day.")
     with tabs[5]:
         st.subheader("Leave Summary")
-        c = conn.cursor()
+        c = cursor
         c.execute("SELECT DISTINCT login FROM schedule")
         login_list = [row[0] for row in c.fetchall()]
         if login_list:
@@ -548,30 +749,26 @@ elif menu == "Reports":
     with tabs[6]:
         st.subheader("Monthly Report")
         # Select multiple weeks and year for the report
-        selected_weeks = st.multiselect("Select Weeks", 
-                                        sorted(pd.read_sql_query("SELECT DISTINCT week FROM schedule", conn)["week"].tolist()))
+        selected_weeks = st.multiselect("Select Weeks", get_distinct_logins_weeks(_db_stamp())[1])
         year_monthly = st.number_input("Enter Year for Report", value=datetime.date.today().year, step=1, key="monthly_year")
         if selected_weeks:
-            # Query leaves for the selected weeks
-            query = "SELECT * FROM leaves WHERE week IN ({seq})".format(seq=','.join(['?']*len(selected_weeks)))
-            df_leaves = pd.read_sql_query(query, conn, params=selected_weeks)
+            # Query leaves for the selected weeks, deriving each record's date
+            # in SQL from the year's first Sunday and the day offset.
+            jan1_monthly = datetime.date(year_monthly, 1, 1)
+            first_sunday_monthly = jan1_monthly - datetime.timedelta(days=(jan1_monthly.weekday() + 1) % 7)
+            df_leaves, df_group, total_leaves = get_monthly_report(tuple(sorted(selected_weeks)), first_sunday_monthly.isoformat(), _leaves_stamp())
             if not df_leaves.empty:
-                # Compute date for each leave record
-                df_leaves["Date"] = df_leaves.apply(lambda row: get_week_dates_us(row["week"], year_monthly)[row["day"]].strftime("%Y-%m-%d"), axis=1)
                 st.dataframe(df_leaves[["login", "week", "day", "Date", "leave_type", "annotation"]])
             else:
                 st.info("No leave records found for selected weeks.")
             
             # Weekly count of leaves
-            df_group = df_leaves.groupby("week").size().reset_index(name="Leaves Count")
             st.write("### Weekly Leaves Count")
             st.dataframe(df_group)
-            total_leaves = df_leaves.shape[0]
             st.write(f"**Total Leaves for selected weeks: {total_leaves}**")
             
             # Total scheduled and current shrinkage calculation for selected weeks
-            df_overview = get_weekly_shrinkage_overview()
-            df_selected = df_overview[df_overview["Week"].isin(selected_weeks)]
+            df_selected = get_weekly_shrinkage_overview(_db_stamp(), tuple(sorted(selected_weeks)))
             total_scheduled = df_selected["Total Scheduled"].sum()
             current_shrinkage = (total_leaves / total_scheduled * 100) if total_scheduled > 0 else 0
             st.write(f"**Total Scheduled for selected weeks: {total_scheduled}**")
@@ -1,16 +1,31 @@
+import os
 import streamlit as st
 import pandas as pd
 import sqlite3
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.mime.application import MIMEApplication
 import io
+import gzip
 
 # ---------------------
 # DATABASE SETUP
 # ---------------------
-conn = sqlite3.connect('csa_data.db', check_same_thread=False)
+# cached_statements keeps prepared statements (compiled VDBE programs)
+# alive across calls; reusing the same SQL string objects below makes
+# every execute a cache hit.
+conn = sqlite3.connect('csa_data.db', check_same_thread=False, cached_statements=256)
+# WAL appends to a log instead of rewriting the rollback journal per commit;
+# synchronous=NORMAL drops the second fsync.
+conn.execute("PRAGMA journal_mode=WAL")
+conn.execute("PRAGMA synchronous=NORMAL")
+conn.execute("PRAGMA temp_store=MEMORY")
+conn.execute("PRAGMA cache_size=-65536")
+conn.execute("PRAGMA mmap_size=268435456")
+conn.execute("PRAGMA busy_timeout=5000")
 cursor = conn.cursor()
 cursor.execute('''
     CREATE TABLE IF NOT EXISTS performance (
@@ -22,8 +37,31 @@ cursor.execute('''
         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
     )
 ''')
+if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_perf'").fetchone():
+    # One-time migration: earlier ingests appended duplicates freely.
+    # Keep the oldest copy of each row, then let the unique index stop
+    # duplicates at insert time from here on.
+    cursor.execute('''
+        DELETE FROM performance WHERE id NOT IN (
+            SELECT MIN(id) FROM performance
+            GROUP BY username, week, metric1, metric2
+        )
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX ux_perf ON performance(username, week, metric1, metric2)
+    ''')
 conn.commit()
 
+INSERT_PREFIX = "INSERT OR IGNORE INTO performance (username, week, metric1, metric2) VALUES "
+# 500 rows x 4 parameters stays under SQLite's default host-variable
+# limit; at most two distinct statement shapes (full chunk + remainder)
+# so both stay in the prepared-statement cache.
+INSERT_CHUNK = 500
+
+def _perf_stamp():
+    # Cheap cache key that changes whenever rows are appended.
+    return conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM performance").fetchone()
+
 # ---------------------
 # STREAMLIT APP SETUP
 # ---------------------
@@ -57,8 +95,22 @@ if not st.session_state.logged_in:
 # LOAD DATA FROM EXCEL
 # ---------------------
 st.subheader("Load Performance Data")
+
+@st.cache_data(show_spinner=False)
+def load_perf_excel(path, mtime):
+    # openpyxl parsing is the slowest step per rerun; cache on path+mtime
+    # so only a changed file is re-parsed. Username becomes categorical
+    # (int codes instead of Python strings) and the unique lists are
+    # computed once here rather than rescanning columns per rerun.
+    # float32/int16 are plenty for dashboard means and halve the bytes
+    # every downstream filter and groupby has to move.
+    df = pd.read_excel(path, engine="openpyxl",
+                       dtype={"Week": "int16", "Metric1": "float32", "Metric2": "float32"})
+    df["Username"] = df["Username"].astype("category")
+    return df, df["Username"].cat.categories.tolist(), sorted(df["Week"].unique().tolist())
+
 try:
-    df = pd.read_excel("csa_performance.xlsx")
+    df, username_list, week_list = load_perf_excel("csa_performance.xlsx", os.path.getmtime("csa_performance.xlsx"))
     st.success("Excel data loaded successfully!")
     st.write("Data loaded from Excel:", df.head())
 except Exception as e:
@@ -69,26 +121,80 @@ except Exception as e:
 # OPTIONAL: SAVE EXCEL DATA TO DATABASE
 # ---------------------
 st.write("Saving Excel data to database (if needed)...")
-for _, row in df.iterrows():
-    cursor.execute('''
-        INSERT INTO performance (username, week, metric1, metric2)
-        VALUES (?, ?, ?, ?)
-    ''', (row["Username"], row["Week"], row["Metric1"], row["Metric2"]))
-conn.commit()
-st.success("Data saved to the database.")
+
+def ingest_to_db(rows, outcome):
+    # Runs on a worker thread with its own connection so the transaction
+    # is owned end to end — sharing the module connection would let a
+    # second session's BEGIN collide with (and its rollback abort) an
+    # ingest already in flight. WAL permits this writer alongside the
+    # script thread's readers. Multi-row VALUES skips executemany's
+    # per-row binding dispatch; everything lands in a single transaction,
+    # and INSERT OR IGNORE makes re-ingesting the same file a no-op. Any
+    # failure is recorded in `outcome` (a plain dict mutated off the
+    # script thread) so the next rerun can report it instead of claiming
+    # success.
+    try:
+        wconn = sqlite3.connect('csa_data.db')
+        wconn.execute("PRAGMA synchronous=NORMAL")
+        wconn.execute("PRAGMA busy_timeout=5000")
+        try:
+            with wconn:
+                for start in range(0, len(rows), INSERT_CHUNK):
+                    chunk = rows[start:start + INSERT_CHUNK]
+                    sql = INSERT_PREFIX + ",".join(["(?, ?, ?, ?)"] * len(chunk))
+                    wconn.execute(sql, [value for row in chunk for value in row])
+                # Index built after the bulk load: the initial ingest
+                # inserts into an index-less table, then this is a no-op.
+                wconn.execute('''
+                    CREATE INDEX IF NOT EXISTS ix_perf_user_week ON performance(username, week)
+                ''')
+        finally:
+            wconn.close()
+    except Exception as exc:
+        outcome["error"] = exc
+
+excel_stat = os.stat("csa_performance.xlsx")
+ingest_key = (excel_stat.st_mtime, excel_stat.st_size)
+if st.session_state.get("ingest_key") != ingest_key:
+    # One-shot per session and file version; the UI renders immediately
+    # while the insert runs, and the stamp-keyed readers pick up the new
+    # rows on the next rerun.
+    rows = list(df[["Username", "Week", "Metric1", "Metric2"]].itertuples(index=False, name=None))
+    outcome = {}
+    ingest_thread = threading.Thread(target=ingest_to_db, args=(rows, outcome), daemon=True)
+    ingest_thread.start()
+    st.session_state["ingest_key"] = ingest_key
+    st.session_state["ingest_thread"] = ingest_thread
+    st.session_state["ingest_outcome"] = outcome
+
+if "error" in st.session_state["ingest_outcome"]:
+    st.error(f"Saving data to the database failed: {st.session_state['ingest_outcome']['error']}")
+elif st.session_state["ingest_thread"].is_alive():
+    st.info("Saving data to the database in the background...")
+else:
+    st.success("Data saved to the database.")
 
 # ---------------------
 # FILTER DATA
 # ---------------------
 st.subheader("Filter Performance Data")
-st.write("Available Usernames:", df["Username"].unique())
-st.write("Available Weeks:", df["Week"].unique())
+st.write("Available Usernames:", username_list)
+st.write("Available Weeks:", week_list)
 
 filter_login = st.text_input("Filter by CSA Login", value=st.session_state.username)
-week_list = sorted(df["Week"].unique())
 filter_week = st.selectbox("Select Week", week_list)
 
-filtered_df = df[(df["Username"] == filter_login) & (df["Week"] == filter_week)]
+@st.cache_data(show_spinner=False)
+def load_user_week(username, week, stamp):
+    # Single index lookup on (username, week) instead of two boolean
+    # masks over the whole DataFrame per rerun.
+    return pd.read_sql_query(
+        "SELECT username AS Username, week AS Week, "
+        "metric1 AS Metric1, metric2 AS Metric2 "
+        "FROM performance WHERE username = ? AND week = ?",
+        conn, params=(username, int(week)))
+
+filtered_df = load_user_week(filter_login, filter_week, _perf_stamp())
 st.write("Filtered Performance Data:")
 st.dataframe(filtered_df)
 
@@ -98,59 +204,112 @@ st.dataframe(filtered_df)
 st.subheader("Weekly Performance Comparison")
 selected_metric = st.selectbox("Select Metric", ["Metric1", "Metric2"])
 
-csa_data = df[df["Username"] == filter_login].sort_values("Week")
-fig, ax = plt.subplots(figsize=(8, 4))
-ax.plot(csa_data["Week"], csa_data[selected_metric], marker="o", label=selected_metric)
-ax.set_xlabel("Week")
-ax.set_ylabel(selected_metric)
-ax.set_title(f"Week-on-Week {selected_metric} Comparison")
-ax.legend()
-st.pyplot(fig)
+@st.cache_data(show_spinner=False)
+def load_user_weeks(username, stamp):
+    # Index range scan on (username, week) returns the rows already
+    # filtered and ordered, instead of masking and sorting the full
+    # DataFrame in Python per rerun.
+    return pd.read_sql_query(
+        "SELECT week AS Week, metric1 AS Metric1, metric2 AS Metric2 "
+        "FROM performance WHERE username = ? ORDER BY week",
+        conn, params=(username,))
+
+csa_data = load_user_weeks(filter_login, _perf_stamp())
+
+@st.cache_data(show_spinner=False, hash_funcs={Figure: lambda _: None})
+def make_plot(user, metric, weeks_tuple, values_tuple):
+    # Rebuilding the Figure is the costliest per-rerun step after Excel
+    # IO; tuples hash stably so unchanged inputs hit the cache.
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.plot(weeks_tuple, values_tuple, marker="o", label=metric)
+    ax.set_xlabel("Week")
+    ax.set_ylabel(metric)
+    ax.set_title(f"Week-on-Week {metric} Comparison")
+    ax.legend()
+    return fig
+
+# Unrelated widget changes (e.g. typing in the email form) rerun the
+# whole script; reuse the stored figure when the plot inputs are
+# unchanged so those reruns skip matplotlib entirely.
+plot_key = (filter_login, filter_week, selected_metric, _perf_stamp())
+if st.session_state.get("last_plot_key") == plot_key and "last_fig" in st.session_state:
+    st.pyplot(st.session_state["last_fig"])
+else:
+    fig = make_plot(filter_login, selected_metric,
+                    tuple(csa_data["Week"]), tuple(csa_data[selected_metric]))
+    st.session_state["last_plot_key"] = plot_key
+    st.session_state["last_fig"] = fig
+    st.pyplot(fig)
 
 st.subheader("Detailed Summary")
-summary = csa_data.groupby("Week")[selected_metric].mean().reset_index()
+# csa_data arrives sorted by Week from SQL, so sort=False skips the key
+# sort, and as_index=False avoids the reset_index copy.
+summary = csa_data[["Week", selected_metric]].groupby("Week", sort=False, as_index=False).mean()
 st.dataframe(summary)
 
 # ---------------------
 # RETRIEVE UNIQUE SAVED DATA (For Email Attachment)
 # ---------------------
-saved_df = pd.read_sql_query("SELECT * FROM performance ORDER BY timestamp DESC", conn)
-saved_df_unique = saved_df.drop_duplicates(subset=["username", "week", "metric1", "metric2"], keep="last")
+@st.cache_data(show_spinner=False)
+def load_saved_unique(stamp):
+    # ux_perf guarantees the table holds no duplicates, so a plain
+    # SELECT suffices; `stamp` only keys the cache.
+    return pd.read_sql_query(
+        "SELECT username, week, metric1, metric2, timestamp FROM performance", conn)
+
+saved_df_unique = load_saved_unique(_perf_stamp())
 
-def send_email(sender_email, sender_password, recipient_email, subject, body, attachment_df=None, attachment_filename="data.csv"):
-    # Create a multipart message (allows both text and attachments)
+@st.cache_resource(show_spinner=False)
+def smtp_conn(sender_email, sender_password):
+    # DNS + TCP + STARTTLS + AUTH cost hundreds of ms per send; keep one
+    # authenticated connection per credential pair for the session.
+    server = smtplib.SMTP("smtp.gmail.com", 587)
+    server.starttls()
+    server.login(sender_email, sender_password)
+    return server
+
+def send_email(sender_email, sender_password, recipient_emails, subject, body, attachment_df=None, attachment_filename="data.csv.gz"):
+    # Create a multipart message (allows both text and attachments).
+    # All recipients go out in one sendmail call over the shared
+    # connection instead of one connection per recipient.
     msg = MIMEMultipart()
     msg["From"] = sender_email
-    msg["To"] = recipient_email
+    msg["To"] = ", ".join(recipient_emails)
     msg["Subject"] = subject
 
     # Attach the email body (plain text)
     msg.attach(MIMEText(body, "plain"))
 
-    # If an attachment (e.g., a DataFrame) is provided, convert it to CSV and attach it
+    # If an attachment (e.g., a DataFrame) is provided, convert it to gzipped CSV and attach it
     if attachment_df is not None:
-        # Create an in-memory text buffer
-        csv_buffer = io.StringIO()
-        # Convert the DataFrame to CSV format and write it to the buffer
-        attachment_df.to_csv(csv_buffer, index=False)
-        csv_string = csv_buffer.getvalue()
-
-        # Create a MIMEText part for the CSV attachment
-        attachment_part = MIMEText(csv_string, "plain")
-        attachment_part.add_header("Content-Disposition", f"attachment; filename={attachment_filename}")
+        # Gzip before base64: CSV text compresses 5-10x, which more than
+        # pays for the MIME encoding blowup. mtime=0 keeps the bytes
+        # deterministic for identical frames.
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) as gz:
+            text = io.TextIOWrapper(gz, "utf-8", newline="")
+            attachment_df.to_csv(text, index=False)
+            text.flush()
+            text.detach()
+
+        attachment_part = MIMEApplication(buf.getvalue(), _subtype="gzip")
+        attachment_part.add_header("Content-Disposition", "attachment", filename=attachment_filename)
         msg.attach(attachment_part)
 
-    # Connect to the SMTP server and send the email
+    # Send over the cached SMTP connection
     try:
-        # For Gmail, use smtp.gmail.com and port 587
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()  # Upgrade the connection to a secure TLS/SSL connection
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, recipient_email, msg.as_string())
-        server.quit()
+        server = smtp_conn(sender_email, sender_password)
+        try:
+            server.sendmail(sender_email, recipient_emails, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # Stale connection (server idle timeout); reconnect once.
+            smtp_conn.clear()
+            server = smtp_conn(sender_email, sender_password)
+            server.sendmail(sender_email, recipient_emails, msg.as_string())
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        st.error(f"Error sending email: {e}")
         return False
 
 
@@ -162,38 +321,14 @@ st.subheader("Send Email with Your Data")
 with st.form("send_email_form"):
     sender_email = st.text_input("shaikhsufiyan22@gmail.com")
     sender_password = st.text_input("Sender Password", type="galaxycom")
-    recipient_email = st.text_input("Recipient Email")
+    recipient_input = st.text_input("Recipient Emails (comma-separated)")
     email_subject = st.text_input("Email Subject", value="Your CSA Performance Data")
     email_body = st.text_area("Email Body", value="Please find attached your CSA performance data.")
     submitted = st.form_submit_button("Send Email")
     
     if submitted:
-        # Call the send_email function defined earlier
-        def send_email(sender_email, sender_password, recipient_email, subject, body, attachment_df=None, attachment_filename="data.csv"):
-            msg = MIMEMultipart()
-            msg["From"] = sender_email
-            msg["To"] = recipient_email
-            msg["Subject"] = subject
-            msg.attach(MIMEText(body, "plain"))
-            if attachment_df is not None:
-                csv_buffer = io.StringIO()
-                attachment_df.to_csv(csv_buffer, index=False)
-                csv_string = csv_buffer.getvalue()
-                attachment_part = MIMEText(csv_string, "plain")
-                attachment_part.add_header("Content-Disposition", f"attachment; filename={attachment_filename}")
-                msg.attach(attachment_part)
-            try:
-                server = smtplib.SMTP("smtp.gmail.com", 587)
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.sendmail(sender_email, recipient_email, msg.as_string())
-                server.quit()
-                return True
-            except Exception as e:
-                st.error(f"Error sending email: {e}")
-                return False
-        
-        if send_email(sender_email, sender_password, recipient_email, email_subject, email_body, attachment_df=saved_df_unique):
+        recipient_emails = [r.strip() for r in recipient_input.split(",") if r.strip()]
+        if send_email(sender_email, sender_password, recipient_emails, email_subject, email_body, attachment_df=saved_df_unique):
             st.success("Email sent successfully!")
         else:
             st.error("Failed to send email.")